@@ -1,126 +1,377 @@
-"""Simple BM25 implementation - no external dependencies."""
+"""Simple BM25 implementation on top of NumPy."""
+import array
+import functools
 import math
+import os
+import pickle
 import re
+import sys
 from collections import Counter
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from .bm25_numba import score_block
+except ImportError:
+    score_block = None
+
+
+_CAMEL_RE = re.compile(r'([a-z])([A-Z])')
+_TOKEN_RE = re.compile(r'[a-z0-9]{2,}')
+
+# Cache size for tokenized texts (chunks are re-tokenized on every BM25 rebuild)
+TOKENIZE_CACHE_SIZE = 8192
+
+# Number of prepared queries kept per index
+QUERY_CACHE_SIZE = 256
+
+# Corpus size above which index() tokenizes in a process pool; below it
+# the pool startup costs more than it saves
+PARALLEL_TOKENIZE_MIN_DOCS = 500
 
 
 def tokenize(text: str) -> list[str]:
     """Simple tokenizer - split on non-alphanumeric, lowercase."""
-    # Split camelCase and snake_case
-    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
-    text = text.replace('_', ' ')
-    # Extract alphanumeric tokens
-    tokens = re.findall(r'[a-zA-Z0-9]+', text.lower())
-    # Filter very short tokens
-    return [t for t in tokens if len(t) > 1]
+    return list(_tokenize_cached(text))
+
+
+@functools.lru_cache(maxsize=TOKENIZE_CACHE_SIZE)
+def _tokenize_cached(text: str) -> tuple[str, ...]:
+    """Memoized tokenizer returning an immutable tuple of tokens."""
+    # Split camelCase; snake_case splits on '_' since it is not a token char
+    text = _CAMEL_RE.sub(r'\1 \2', text)
+    # Extract alphanumeric tokens of 2+ chars (very short tokens are dropped).
+    # Interning shares one string object per distinct token across cached
+    # token tuples and posting keys, and lets dict lookups match by identity.
+    return tuple(map(sys.intern, _TOKEN_RE.findall(text.lower())))
 
 
 @dataclass
 class BM25Index:
-    """BM25 index for a collection of documents."""
+    """BM25 index for a collection of documents.
+    
+    Postings are stored per term as parallel NumPy arrays so a query is
+    scored with a handful of vectorized operations per query term.
+    """
     # Parameters
     k1: float = 1.5  # Term frequency saturation
     b: float = 0.75  # Length normalization
     
     # Index data
     doc_freqs: dict[str, int] = None  # term -> num docs containing term
-    doc_lens: list[int] = None  # Length of each doc
+    doc_lens: np.ndarray = None  # Length of each doc
     avg_doc_len: float = 0.0
     num_docs: int = 0
-    doc_term_freqs: list[dict[str, int]] = None  # term freqs per doc
+    postings: dict[str, tuple[np.ndarray, np.ndarray]] = None  # term -> (doc_ids, tfs)
+    idf: dict[str, float] = None  # term -> IDF weight
+    norm_ids: np.ndarray = None  # Per-doc quantized length (uint8)
+    norm_lut: np.ndarray = None  # Quantized length -> k1 * length normalization
+    
+    # query -> prepared (postings, idf) terms and matched docs
+    _query_cache: dict = field(default=None, repr=False, compare=False)
     
     def __post_init__(self):
         self.doc_freqs = {}
-        self.doc_lens = []
-        self.doc_term_freqs = []
+        self.doc_lens = np.zeros(0, dtype=np.int32)
+        self.postings = {}
+        self.idf = {}
+        self.norm_ids = np.zeros(0, dtype=np.uint8)
+        self.norm_lut = np.zeros(256, dtype=np.float32)
+        self._query_cache = {}
     
     def index(self, documents: list[str]):
         """Build index from documents."""
-        self.doc_freqs = {}
-        self.doc_lens = []
-        self.doc_term_freqs = []
         self.num_docs = len(documents)
         
-        for doc in documents:
-            tokens = tokenize(doc)
-            self.doc_lens.append(len(tokens))
-            
-            # Term frequencies for this doc
-            term_freqs = Counter(tokens)
-            self.doc_term_freqs.append(dict(term_freqs))
+        doc_lens = array.array("i")
+        term_docs: dict[str, array.array] = {}
+        term_tfs: dict[str, array.array] = {}
+        
+        for doc_idx, tokens in enumerate(_tokenize_all(documents)):
+            doc_lens.append(len(tokens))
             
-            # Update document frequencies
-            for term in term_freqs:
-                self.doc_freqs[term] = self.doc_freqs.get(term, 0) + 1
+            # Append this doc to the posting list of every term it contains;
+            # int32 buffers keep the build at 4 bytes per posting
+            for term, tf in Counter(tokens).items():
+                if term not in term_docs:
+                    term_docs[term] = array.array("i")
+                    term_tfs[term] = array.array("i")
+                term_docs[term].append(doc_idx)
+                term_tfs[term].append(tf)
         
-        self.avg_doc_len = sum(self.doc_lens) / max(self.num_docs, 1)
+        # Copy into exact-size arrays so the over-allocated buffers are freed
+        self.postings = {
+            term: (
+                np.array(doc_ids, dtype=np.int32),
+                np.array(term_tfs[term], dtype=np.int32),
+            )
+            for term, doc_ids in term_docs.items()
+        }
+        self.doc_freqs = {term: len(doc_ids) for term, doc_ids in term_docs.items()}
+        self.doc_lens = np.frombuffer(doc_lens, dtype=np.int32)
+        self.avg_doc_len = sum(doc_lens) / max(self.num_docs, 1)
+        
+        # IDF only depends on the term and length normalization only on the
+        # doc, so materialize both once instead of per (doc, term) pair
+        n = self.num_docs
+        self.idf = {
+            term: math.log((n - df + 0.5) / (df + 0.5) + 1)
+            for term, df in self.doc_freqs.items()
+        }
+        
+        # Store lengths as 1-byte fieldnorms (like Lucene) and look the
+        # normalization up in a 256-entry table
+        avg_doc_len = self.avg_doc_len or 1.0
+        self.norm_ids = _encode_fieldnorms(self.doc_lens)
+        self.norm_lut = (
+            self.k1 * (1 - self.b + self.b * _FIELDNORM_TABLE / avg_doc_len)
+        ).astype(np.float32)
+        self._query_cache.clear()
     
     def search(self, query: str, top_k: int = 10) -> list[tuple[int, float]]:
         """Search and return list of (doc_index, score) tuples."""
-        query_tokens = tokenize(query)
-        scores = []
+        if self.num_docs == 0 or top_k <= 0:
+            return []
+        
+        terms, matched = self._prepare_query(query)
+        scores = self._score_postings(terms)
+        
+        # Select top-k without sorting all matched scores
+        top_indices = matched[_top_k(scores[matched], top_k)]
         
-        for doc_idx in range(self.num_docs):
-            score = self._score_doc(query_tokens, doc_idx)
-            scores.append((doc_idx, score))
+        # Pad with zero-score docs (in index order) like a full ranking would
+        missing = min(top_k, self.num_docs) - len(top_indices)
+        if missing > 0:
+            filler = np.setdiff1d(
+                np.arange(missing + len(matched)), matched, assume_unique=True
+            )[:missing]
+            top_indices = np.concatenate([top_indices, filler])
         
-        # Sort by score descending
-        scores.sort(key=lambda x: x[1], reverse=True)
-        return scores[:top_k]
+        return [(int(idx), float(scores[idx])) for idx in top_indices]
     
-    def _score_doc(self, query_tokens: list[str], doc_idx: int) -> float:
-        """Compute BM25 score for a document."""
-        score = 0.0
-        doc_len = self.doc_lens[doc_idx]
-        term_freqs = self.doc_term_freqs[doc_idx]
+    def save(self, path: Path):
+        """Write the index to a directory for memory-mapped loading.
         
-        for term in query_tokens:
-            if term not in self.doc_freqs:
-                continue
-            
-            # Term frequency in this doc
-            tf = term_freqs.get(term, 0)
-            if tf == 0:
+        postings.bin holds every term's doc_ids followed by its tfs as one
+        flat int32 array; meta.pkl holds the term offsets and the small
+        per-doc and per-term tables.
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        
+        offsets = {}
+        position = 0
+        for term, (doc_ids, _) in self.postings.items():
+            offsets[term] = (position, len(doc_ids))
+            position += 2 * len(doc_ids)
+        
+        flat = np.empty(position, dtype=np.int32)
+        for term, (doc_ids, tfs) in self.postings.items():
+            start, n = offsets[term]
+            flat[start:start + n] = doc_ids
+            flat[start + n:start + 2 * n] = tfs
+        
+        meta = {
+            "k1": self.k1,
+            "b": self.b,
+            "num_docs": self.num_docs,
+            "avg_doc_len": self.avg_doc_len,
+            "doc_lens": self.doc_lens,
+            "norm_ids": self.norm_ids,
+            "norm_lut": self.norm_lut,
+            "idf": self.idf,
+            "offsets": offsets,
+            "num_postings_values": position,
+        }
+        
+        # Write to temp files and rename so a concurrent reader never sees
+        # a half-written index (existing mappings keep the old inode)
+        _atomic_write(path / "postings.bin", flat.tobytes())
+        _atomic_write(path / "meta.pkl", pickle.dumps(meta, protocol=pickle.HIGHEST_PROTOCOL))
+    
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        """Load an index written by save(), memory-mapping the postings."""
+        path = Path(path)
+        with open(path / "meta.pkl", "rb") as f:
+            meta = pickle.load(f)
+        
+        index = cls(k1=meta["k1"], b=meta["b"])
+        if meta["num_postings_values"]:
+            flat = np.memmap(path / "postings.bin", dtype=np.int32, mode="r")
+            flat = flat.view(np.ndarray)
+        else:
+            flat = np.zeros(0, dtype=np.int32)  # mmap of an empty file fails
+        if len(flat) != meta["num_postings_values"]:
+            raise ValueError(f"BM25 postings file does not match metadata in {path}")
+        
+        index.num_docs = meta["num_docs"]
+        index.avg_doc_len = meta["avg_doc_len"]
+        index.doc_lens = meta["doc_lens"]
+        index.norm_ids = meta["norm_ids"]
+        index.norm_lut = meta["norm_lut"]
+        index.idf = meta["idf"]
+        index.postings = {
+            term: (flat[start:start + n], flat[start + n:start + 2 * n])
+            for term, (start, n) in meta["offsets"].items()
+        }
+        index.doc_freqs = {term: n for term, (_, n) in meta["offsets"].items()}
+        return index
+    
+    def _prepare_query(self, query: str) -> tuple[list, np.ndarray]:
+        """Resolve a query to its (doc_ids, tfs, idf) terms and matched docs.
+        
+        Only depends on the query and the index, so repeated queries are
+        served from a small per-index cache that index() clears.
+        """
+        cached = self._query_cache.get(query)
+        if cached is not None:
+            return cached
+        
+        terms = [
+            (*self.postings[t], self.idf[t])
+            for t in _tokenize_cached(query)
+            if t in self.postings
+        ]
+        
+        # Only docs on a query term's posting list can have a non-zero score,
+        # so rank those instead of the whole corpus
+        if terms:
+            matched = np.unique(np.concatenate([doc_ids for doc_ids, _, _ in terms]))
+        else:
+            matched = np.zeros(0, dtype=np.int32)
+        
+        if len(self._query_cache) >= QUERY_CACHE_SIZE:
+            del self._query_cache[next(iter(self._query_cache))]
+        self._query_cache[query] = (terms, matched)
+        return terms, matched
+    
+    def _score_postings(self, terms: list) -> np.ndarray:
+        """Compute BM25 scores by walking the query terms' posting lists.
+        
+        Returns a dense score array; docs matching no query term stay zero.
+        """
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        
+        for doc_ids, tfs, idf in terms:
+            if score_block is not None:
+                score_block(
+                    doc_ids, tfs, self.norm_ids, self.norm_lut, idf, self.k1, scores
+                )
                 continue
             
-            # Document frequency
-            df = self.doc_freqs[term]
-            
-            # IDF component
-            idf = math.log((self.num_docs - df + 0.5) / (df + 0.5) + 1)
-            
             # TF component with saturation and length normalization
-            tf_norm = (tf * (self.k1 + 1)) / (
-                tf + self.k1 * (1 - self.b + self.b * doc_len / self.avg_doc_len)
-            )
+            len_norm = self.norm_lut[self.norm_ids[doc_ids]]
+            tf_norm = tfs * (self.k1 + 1) / (tfs + len_norm)
             
-            score += idf * tf_norm
+            np.add.at(scores, doc_ids, idf * tf_norm)
         
-        return score
+        return scores
+
+
+def _atomic_write(path: Path, data: bytes):
+    """Write a file via a temp file and rename."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def _tokenize_all(documents: list[str]):
+    """Tokenize documents, across processes for large corpora.
+    
+    Tokenization is pure-Python regex work that holds the GIL, so only
+    separate processes can spread it over cores.
+    """
+    workers = os.cpu_count() or 1
+    if len(documents) <= PARALLEL_TOKENIZE_MIN_DOCS or workers < 2:
+        return map(_tokenize_cached, documents)
+    
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(_tokenize_cached, documents, chunksize=64))
+    except (OSError, RuntimeError):
+        # Process creation can be unavailable (sandboxes, frozen apps)
+        return map(_tokenize_cached, documents)
+
+
+def _decode_fieldnorm(byte: int) -> int:
+    """Decode a 1-byte fieldnorm (Lucene's SmallFloat.byte4ToInt).
+    
+    Lengths below 24 are exact; above that a 4-bit mantissa is kept.
+    """
+    if byte < 24:
+        return byte
+    bits = (byte - 24) & 0x07
+    shift = ((byte - 24) >> 3) - 1
+    if shift == -1:
+        return 24 + bits
+    return 24 + ((bits | 0x08) << shift)
+
+
+# Doc length represented by each fieldnorm byte, in increasing order
+_FIELDNORM_TABLE = np.array([_decode_fieldnorm(i) for i in range(256)], dtype=np.float64)
+
+
+def _encode_fieldnorms(doc_lens: np.ndarray) -> np.ndarray:
+    """Quantize doc lengths to the largest fieldnorm not above them."""
+    codes = np.searchsorted(_FIELDNORM_TABLE, doc_lens, side="right") - 1
+    return codes.astype(np.uint8)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest scores, best first, ties by lowest position."""
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    
+    # Everything above the k-th largest score is in, then fill with the
+    # lowest positions that tie with it
+    threshold = np.partition(scores, -k)[-k]
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+    selected = np.sort(np.concatenate([above, ties]))
+    return selected[np.argsort(-scores[selected], kind="stable")]
 
 
 def reciprocal_rank_fusion(
     rankings: list[list[tuple[int, float]]],
     k: int = 60,
+    top_k: int | None = None,
 ) -> list[tuple[int, float]]:
     """Fuse multiple rankings using RRF.
     
     Args:
         rankings: List of rankings, each is [(doc_idx, score), ...]
         k: RRF constant (default 60)
+        top_k: Only return the best top_k fused results (default: all)
     
     Returns:
         Fused ranking as [(doc_idx, fused_score), ...]
     """
-    fused_scores: dict[int, float] = {}
+    # k is shared by all rankings, so compute the 1 / (k + rank) table once
+    max_len = max((len(ranking) for ranking in rankings), default=0)
+    reciprocals = 1.0 / (k + np.arange(1, max_len + 1))
     
+    doc_ids = []
+    contribs = []
     for ranking in rankings:
-        for rank, (doc_idx, _) in enumerate(ranking):
-            if doc_idx not in fused_scores:
-                fused_scores[doc_idx] = 0.0
-            fused_scores[doc_idx] += 1.0 / (k + rank + 1)
-    
-    # Sort by fused score
-    results = sorted(fused_scores.items(), key=lambda x: x[1], reverse=True)
-    return results
\ No newline at end of file
+        doc_ids.append(np.fromiter(
+            (doc_idx for doc_idx, _ in ranking), dtype=np.int64, count=len(ranking)
+        ))
+        contribs.append(reciprocals[:len(ranking)])
+    
+    if not any(len(ids) for ids in doc_ids):
+        return []
+    all_ids = np.concatenate(doc_ids)
+    
+    # Sum contributions per distinct doc in one C loop
+    unique_ids, first_seen, slots = np.unique(all_ids, return_index=True, return_inverse=True)
+    fused_scores = np.bincount(slots, weights=np.concatenate(contribs))
+    
+    # Sort by fused score, ties in order of first appearance
+    order = np.lexsort((first_seen, -fused_scores))
+    if top_k is not None:
+        order = order[:top_k]
+    return [(int(unique_ids[i]), float(fused_scores[i])) for i in order]
\ No newline at end of file
@@ -0,0 +1,15 @@
+"""Numba-compiled BM25 scoring kernel (optional, used when numba is installed)."""
+import numba
+
+
+@numba.njit(cache=True, fastmath=True)
+def score_block(doc_ids, tfs, norm_ids, norm_lut, idf, k1, out):
+    """Accumulate one query term's BM25 contribution into `out`.
+    
+    Fuses the saturation, length normalization and accumulation into a
+    single loop over the term's posting list, without NumPy temporaries.
+    """
+    for i in range(doc_ids.shape[0]):
+        doc_id = doc_ids[i]
+        tf = tfs[i]
+        out[doc_id] += idf * tf * (k1 + 1) / (tf + norm_lut[norm_ids[doc_id]])
@@ -1,6 +1,8 @@
 """Code chunking - AST-based for Python, line-based for others."""
 import ast
+import hashlib
 import re
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -15,8 +17,38 @@ class Chunk:
     end_line: int
 
 
+# Max number of files whose chunks are kept in memory
+CHUNK_CACHE_SIZE = 4096
+
+# (suffix, content digest) -> chunks, in LRU order
+_CHUNK_CACHE: OrderedDict[tuple[str, bytes], list[Chunk]] = OrderedDict()
+
+
 def chunk_file(file_path: Path, content: str) -> list[Chunk]:
-    """Chunk a file based on its type."""
+    """Chunk a file based on its type.
+    
+    Results are cached by content hash, so files whose mtime changed but
+    whose content did not (checkouts, touch, forced reindex) skip parsing.
+    """
+    digest = hashlib.blake2b(
+        content.encode("utf-8", "surrogatepass"), digest_size=16
+    ).digest()
+    key = (file_path.suffix, digest)
+    
+    chunks = _CHUNK_CACHE.get(key)
+    if chunks is not None:
+        _CHUNK_CACHE.move_to_end(key)
+        return list(chunks)
+    
+    chunks = _chunk_by_type(file_path, content)
+    _CHUNK_CACHE[key] = chunks
+    if len(_CHUNK_CACHE) > CHUNK_CACHE_SIZE:
+        _CHUNK_CACHE.popitem(last=False)
+    return list(chunks)
+
+
+def _chunk_by_type(file_path: Path, content: str) -> list[Chunk]:
+    """Dispatch to the chunker for the file's type."""
     if file_path.suffix == ".py":
         try:
             return chunk_python(content)
@@ -35,87 +67,18 @@ def chunk_python(content: str) -> list[Chunk]:
     - Functions/methods become individual chunks (methods get class context prefix)
     - Classes become signature + docstring only (body is covered by method chunks)
     - Avoids duplicate indexing of methods
+    - Only module-level definitions and class bodies are scanned; functions
+      nested inside functions stay part of their enclosing function's chunk
     """
     tree = ast.parse(content)
-    lines = content.splitlines()
+    source = _Source(content)
     chunks = []
     
-    # Collect all method line ranges to avoid including them in class chunks
-    method_ranges: set[tuple[int, int]] = set()
-    
-    for node in ast.walk(tree):
+    for node in _iter_definitions(tree.body):
         if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-            parent = _find_parent_class(tree, node)
-            if parent:
-                end_line = node.end_lineno if node.end_lineno is not None else node.lineno
-                method_ranges.add((node.lineno, end_line))
-    
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-            # Function or method
-            start_line = node.lineno
-            end_line = node.end_lineno if node.end_lineno is not None else start_line
-            
-            node_lines = lines[start_line - 1:end_line]
-            chunk_text = "\n".join(node_lines)
-            
-            # For methods, include class context
-            parent_class = _find_parent_class(tree, node)
-            if parent_class:
-                chunk_text = f"class {parent_class}:\n" + _indent(chunk_text)
-            
-            # Truncate very long functions
-            if len(node_lines) > CHUNK_SIZE_LINES:
-                preview_lines = node_lines[:CHUNK_SIZE_LINES - 2]
-                remaining = len(node_lines) - len(preview_lines)
-                chunk_text = "\n".join(preview_lines) + f"\n    # ... ({remaining} more lines)"
-                if parent_class:
-                    chunk_text = f"class {parent_class}:\n" + _indent("\n".join(preview_lines)) + f"\n        # ... ({remaining} more lines)"
-            
-            chunks.append(Chunk(
-                text=chunk_text,
-                start_line=start_line,
-                end_line=end_line,
-            ))
-        
+            chunks.append(_function_chunk(node, source, None))
         elif isinstance(node, ast.ClassDef):
-            # Class: only signature + docstring, not the full body
-            start_line = node.lineno
-            node_end_line = node.end_lineno if node.end_lineno is not None else start_line
-            
-            # Find where the class body starts (after decorators and signature)
-            # Get docstring if present
-            docstring = ast.get_docstring(node)
-            
-            # Build class chunk: signature + docstring only
-            class_line = lines[start_line - 1]
-            chunk_text = class_line
-            
-            # Add docstring if present
-            if docstring:
-                # Find docstring end line
-                first_stmt = node.body[0] if node.body else None
-                if first_stmt and isinstance(first_stmt, ast.Expr) and isinstance(first_stmt.value, ast.Constant):
-                    doc_end = first_stmt.end_lineno if first_stmt.end_lineno is not None else start_line
-                    doc_lines = lines[start_line:doc_end]
-                    chunk_text = class_line + "\n" + "\n".join(doc_lines)
-                    end_line = doc_end
-                else:
-                    end_line = start_line
-            else:
-                end_line = start_line
-                # If no docstring, include first few lines for context
-                body_start = node.body[0].lineno if node.body else start_line + 1
-                preview_end = min(body_start + 2, start_line + 5)
-                if preview_end > start_line:
-                    chunk_text = "\n".join(lines[start_line - 1:preview_end]) + "\n    # ..."
-                    end_line = preview_end
-            
-            chunks.append(Chunk(
-                text=chunk_text,
-                start_line=start_line,
-                end_line=end_line,
-            ))
+            _collect_class_chunks(node, source, chunks)
     
     # If no AST nodes found, fall back to line-based
     if not chunks:
@@ -124,23 +87,138 @@ def chunk_python(content: str) -> list[Chunk]:
     return chunks
 
 
-def _find_parent_class(tree: ast.AST, target_node: ast.AST) -> str | None:
-    """Find the parent class name for a method."""
-    for node in ast.walk(tree):
-        if isinstance(node, ast.ClassDef):
-            for child in ast.iter_child_nodes(node):
-                if child is target_node:
-                    return node.name
-                # Check nested in body
-                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)) and child is target_node:
-                    return node.name
-    # Fallback: walk class bodies
-    for node in ast.walk(tree):
-        if isinstance(node, ast.ClassDef):
-            for child in node.body:
-                if child is target_node:
-                    return node.name
-    return None
+def _iter_definitions(body: list[ast.stmt]):
+    """Yield function/class definitions in a block, without entering them.
+    
+    Descends into if/try/with blocks so conditionally defined functions
+    and classes (e.g. import fallbacks) are still found.
+    """
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            yield node
+        elif isinstance(node, ast.If):
+            yield from _iter_definitions(node.body)
+            yield from _iter_definitions(node.orelse)
+        elif isinstance(node, (ast.Try, ast.TryStar)):
+            yield from _iter_definitions(node.body)
+            for handler in node.handlers:
+                yield from _iter_definitions(handler.body)
+            yield from _iter_definitions(node.orelse)
+            yield from _iter_definitions(node.finalbody)
+        elif isinstance(node, (ast.With, ast.AsyncWith)):
+            yield from _iter_definitions(node.body)
+
+
+def _collect_class_chunks(node: ast.ClassDef, source: "_Source", chunks: list[Chunk]):
+    """Append chunks for a class, its methods and any nested classes."""
+    chunks.append(_class_chunk(node, source))
+    
+    for child in _iter_definitions(node.body):
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            chunks.append(_function_chunk(child, source, node.name))
+        elif isinstance(child, ast.ClassDef):
+            _collect_class_chunks(child, source, chunks)
+
+
+def _function_chunk(
+    node: ast.FunctionDef | ast.AsyncFunctionDef,
+    source: "_Source",
+    parent_class: str | None,
+) -> Chunk:
+    """Build the chunk for a function or method (methods get class context)."""
+    start_line = node.lineno
+    end_line = node.end_lineno if node.end_lineno is not None else start_line
+    
+    # Decide on truncation of very long functions first, so the text is
+    # sliced and formatted only once
+    num_lines = min(end_line, source.num_lines) - start_line + 1
+    truncated = num_lines > CHUNK_SIZE_LINES
+    if truncated:
+        chunk_text = source.lines(start_line, start_line + CHUNK_SIZE_LINES - 3)
+    else:
+        chunk_text = source.lines(start_line, end_line)
+    
+    # For methods, include class context
+    marker_indent = "    "
+    if parent_class:
+        chunk_text = f"class {parent_class}:\n" + _indent(chunk_text)
+        marker_indent = "        "
+    
+    if truncated:
+        remaining = num_lines - (CHUNK_SIZE_LINES - 2)
+        chunk_text += f"\n{marker_indent}# ... ({remaining} more lines)"
+    
+    return Chunk(
+        text=chunk_text,
+        start_line=start_line,
+        end_line=end_line,
+    )
+
+
+def _class_chunk(node: ast.ClassDef, source: "_Source") -> Chunk:
+    """Build the chunk for a class: only signature + docstring, not the full body."""
+    start_line = node.lineno
+    
+    # Get docstring if present
+    docstring = ast.get_docstring(node)
+    
+    # Build class chunk: signature + docstring only
+    class_line = source.lines(start_line, start_line)
+    chunk_text = class_line
+    
+    # Add docstring if present
+    if docstring:
+        # Find docstring end line
+        first_stmt = node.body[0] if node.body else None
+        if first_stmt and isinstance(first_stmt, ast.Expr) and isinstance(first_stmt.value, ast.Constant):
+            doc_end = first_stmt.end_lineno if first_stmt.end_lineno is not None else start_line
+            chunk_text = source.lines(start_line, doc_end)
+            end_line = doc_end
+        else:
+            end_line = start_line
+    else:
+        end_line = start_line
+        # If no docstring, include first few lines for context
+        body_start = node.body[0].lineno if node.body else start_line + 1
+        preview_end = min(body_start + 2, start_line + 5)
+        if preview_end > start_line:
+            chunk_text = source.lines(start_line, preview_end) + "\n    # ..."
+            end_line = preview_end
+    
+    return Chunk(
+        text=chunk_text,
+        start_line=start_line,
+        end_line=end_line,
+    )
+
+
+class _Source:
+    """Source text with a line-offset table, for slicing lines without splitting."""
+    
+    def __init__(self, content: str):
+        self.content = content
+        # offsets[i] is where line i + 1 starts
+        self.offsets = [0]
+        self.offsets.extend(m.end() for m in re.finditer("\n", content))
+        if len(self.offsets) > 1 and self.offsets[-1] == len(content):
+            self.offsets.pop()  # A trailing newline doesn't start a new line
+        self.num_lines = len(self.offsets) if content else 0
+        self.crlf = "\r\n" in content
+    
+    def lines(self, start_line: int, end_line: int) -> str:
+        """Text of lines start_line..end_line (1-based, inclusive), "\n"-joined."""
+        end_line = min(end_line, self.num_lines)
+        if end_line < start_line:
+            return ""
+        start = self.offsets[start_line - 1]
+        if end_line < self.num_lines:
+            end = self.offsets[end_line] - 1
+        else:
+            end = len(self.content) - self.content.endswith("\n")
+        text = self.content[start:end]
+        if self.crlf:
+            text = text.replace("\r\n", "\n").removesuffix("\r")
+        return text
 
 
 def _indent(text: str, spaces: int = 4) -> str:
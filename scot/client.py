@@ -6,7 +6,7 @@ import sys
 from pathlib import Path
 
 from .config import SOCKET_PATH
-from .protocol import Request, Response
+from .protocol import Request, Response, send_message, recv_message
 from .daemon import daemon_status
 
 
@@ -46,32 +46,71 @@ def ensure_daemon_running() -> bool:
 
 def send_request(request: Request) -> Response:
     """Send a request to the daemon and get response."""
-    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-    try:
-        sock.connect(str(SOCKET_PATH))
-        
-        # Send length-prefixed message
-        data = request.to_json().encode("utf-8")
-        header = f"{len(data):08d}".encode("utf-8")
-        sock.sendall(header + data)
-        
-        # Read length-prefixed response
-        header = b""
-        while len(header) < 8:
-            chunk = sock.recv(8 - len(header))
-            if not chunk:
-                raise ConnectionError("Connection closed while reading header")
-            header += chunk
-        
-        msg_len = int(header.decode("utf-8"))
-        
-        response_data = b""
-        while len(response_data) < msg_len:
-            chunk = sock.recv(min(65536, msg_len - len(response_data)))
-            if not chunk:
-                raise ConnectionError("Connection closed while reading response")
-            response_data += chunk
-        
-        return Response.from_json(response_data.decode("utf-8"))
-    finally:
-        sock.close()
\ No newline at end of file
+    with Client() as client:
+        return client.send(request)
+
+
+class Client:
+    """Connection to the daemon that is reused across requests.
+    
+    Use as a context manager when issuing several requests, to skip a
+    connect/close per request:
+    
+        with Client() as client:
+            for query in queries:
+                client.send(Request(action="search", query=query, ...))
+    """
+    
+    def __init__(self, socket_path: Path = SOCKET_PATH):
+        self.socket_path = socket_path
+        self.sock = None
+        self._reused = False
+    
+    def connect(self):
+        """Open the connection if it isn't open yet."""
+        if self.sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(str(self.socket_path))
+            except OSError:
+                sock.close()
+                raise
+            self.sock = sock
+            self._reused = False
+    
+    def close(self):
+        """Close the connection."""
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+    
+    def send(self, request: Request) -> Response:
+        """Send a request over the connection and wait for its response."""
+        self.connect()
+        try:
+            response = self._roundtrip(request)
+        except ConnectionError:
+            if not self._reused:
+                raise
+            # The daemon drops idle connections; retry once on a fresh one
+            self.close()
+            self.connect()
+            response = self._roundtrip(request)
+        self._reused = True
+        return response
+    
+    def _roundtrip(self, request: Request) -> Response:
+        """Exchange one request/response, dropping the socket if it broke."""
+        try:
+            send_message(self.sock, request.to_bytes())
+            return Response.from_bytes(recv_message(self.sock))
+        except ConnectionError:
+            self.close()
+            raise
+    
+    def __enter__(self) -> "Client":
+        self.connect()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
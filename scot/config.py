@@ -7,6 +7,7 @@ SCOT_DIR = Path(os.environ.get("SCOT_DIR", Path.home() / ".scot"))
 SOCKET_PATH = SCOT_DIR / "scotd.sock"
 PID_FILE = SCOT_DIR / "scotd.pid"
 DB_PATH = SCOT_DIR / "index.db"
+BM25_DIR = SCOT_DIR / "bm25"
 
 # Model configuration
 MODEL_NAME = "google/embeddinggemma-300m"
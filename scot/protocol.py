@@ -1,8 +1,14 @@
 """Communication protocol between CLI and daemon."""
 import json
+import socket
 from dataclasses import dataclass, asdict
 from typing import Any
 
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 
 @dataclass
 class Request:
@@ -21,6 +27,13 @@ class Request:
     @classmethod
     def from_json(cls, data: str) -> "Request":
         return cls(**json.loads(data))
+    
+    def to_bytes(self) -> bytes:
+        return encode_payload(asdict(self))
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Request":
+        return cls(**decode_payload(data))
 
 
 @dataclass
@@ -31,14 +44,73 @@ class Response:
     results: list[dict] = None  # For search results
     stats: dict = None  # For index stats
     
-    def to_json(self) -> str:
+    def to_dict(self) -> dict:
         d = asdict(self)
         if d["results"] is None:
             d["results"] = []
         if d["stats"] is None:
             d["stats"] = {}
-        return json.dumps(d)
+        return d
+    
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
     
     @classmethod
     def from_json(cls, data: str) -> "Response":
-        return cls(**json.loads(data))
\ No newline at end of file
+        return cls(**json.loads(data))
+    
+    def to_bytes(self) -> bytes:
+        return encode_payload(self.to_dict())
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Response":
+        return cls(**decode_payload(data))
+
+
+def encode_payload(obj: dict) -> bytes:
+    """Encode a message body as msgpack, or JSON if msgpack is not installed."""
+    if msgpack is not None:
+        return msgpack.packb(obj, use_bin_type=True)
+    return json.dumps(obj).encode("utf-8")
+
+
+def decode_payload(data: bytes) -> dict:
+    """Decode a message body produced by encode_payload.
+    
+    JSON bodies always start with '{', which never starts a msgpack map,
+    so either side can fall back to JSON (e.g. for debugging).
+    """
+    if data[:1] == b"{":
+        return json.loads(data)
+    if msgpack is None:
+        raise RuntimeError("Received a msgpack message but msgpack is not installed")
+    return msgpack.unpackb(data, raw=False)
+
+
+# Messages are framed as an 8-digit ASCII length followed by the payload
+HEADER_SIZE = 8
+
+
+def send_message(sock: socket.socket, data: bytes):
+    """Send a length-prefixed message in a single sendall."""
+    sock.sendall(f"{len(data):08d}".encode("utf-8") + data)
+
+
+def recv_message(sock: socket.socket) -> bytes:
+    """Receive a length-prefixed message."""
+    header = _recv_exact(sock, HEADER_SIZE, "header")
+    msg_len = int(header.decode("utf-8"))
+    return bytes(_recv_exact(sock, msg_len, "message"))
+
+
+def _recv_exact(sock: socket.socket, size: int, what: str) -> bytearray:
+    """Read exactly `size` bytes into one preallocated buffer."""
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if not n:
+            raise ConnectionError(f"Connection closed while reading {what}")
+        received += n
+    return buf
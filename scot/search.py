@@ -1,13 +1,17 @@
 """Search functionality."""
 from dataclasses import dataclass
 from pathlib import Path
+import hashlib
+import pickle
 import numpy as np
 import time
+from typing import Optional
 
 from .db import get_connection, get_or_create_repo, get_repo_chunks
 from .embedder import Embedder, cosine_similarity_matrix
 from .indexer import index_repo
 from .bm25 import BM25Index, reciprocal_rank_fusion
+from .config import BM25_DIR
 
 
 @dataclass
@@ -91,13 +95,18 @@ def search(
                 bm25 = cached_bm25
                 use_cached = True
         
-        # Build new index if needed
+        # Load the persisted index, or build a new one if needed
         if bm25 is None:
-            bm25 = BM25Index()
-            bm25.index([c["chunk_text"] for c in chunks])
+            chunk_ids = tuple(c["id"] for c in all_chunks)
+            if not file_pattern:
+                bm25 = load_persisted_bm25(repo_root, chunk_ids)
+            if bm25 is None:
+                bm25 = BM25Index()
+                bm25.index([c["chunk_text"] for c in chunks])
+                if not file_pattern:
+                    persist_bm25(repo_root, bm25, chunk_ids)
             # Cache it (only if no file pattern filter)
             if bm25_cache is not None and not file_pattern:
-                chunk_ids = tuple(c["id"] for c in all_chunks)
                 bm25_cache[cache_key] = (bm25, chunk_ids)
         
         lexical_ranking = bm25.search(query, top_k=fetch_k)
@@ -105,8 +114,8 @@ def search(
     
     # Combine results
     if mode == "hybrid":
-        fused = reciprocal_rank_fusion(rankings)
-        top_indices = [idx for idx, _ in fused[:top_k]]
+        fused = reciprocal_rank_fusion(rankings, top_k=top_k)
+        top_indices = [idx for idx, _ in fused]
         scores = {idx: score for idx, score in fused}
     elif mode == "semantic":
         top_indices = [idx for idx, _ in rankings[0][:top_k]]
@@ -130,6 +139,36 @@ def search(
     return results
 
 
+def _bm25_dir(repo_root: Path) -> Path:
+    """Directory holding the persisted BM25 index for a repo."""
+    digest = hashlib.blake2b(str(repo_root).encode("utf-8"), digest_size=8).hexdigest()
+    return BM25_DIR / digest
+
+
+def load_persisted_bm25(repo_root: Path, chunk_ids: tuple) -> Optional[BM25Index]:
+    """Load the on-disk BM25 index if it was built from exactly these chunks."""
+    path = _bm25_dir(repo_root)
+    try:
+        stored_ids = np.load(path / "chunk_ids.npy")
+        if tuple(stored_ids.tolist()) != chunk_ids:
+            return None
+        return BM25Index.load(path)
+    except (OSError, ValueError, EOFError, KeyError, pickle.UnpicklingError):
+        return None
+
+
+def persist_bm25(repo_root: Path, bm25: BM25Index, chunk_ids: tuple):
+    """Save a BM25 index so a restarted daemon can mmap it instead of rebuilding."""
+    path = _bm25_dir(repo_root)
+    try:
+        # chunk_ids.npy marks the index as valid, so drop it while rewriting
+        (path / "chunk_ids.npy").unlink(missing_ok=True)
+        bm25.save(path)
+        np.save(path / "chunk_ids.npy", np.asarray(chunk_ids, dtype=np.int64))
+    except OSError:
+        pass  # Persisting is only an optimization
+
+
 def add_context_lines(
     result: SearchResult,
     repo_root: Path,
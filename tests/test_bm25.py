@@ -1,6 +1,7 @@
 """Tests for BM25 search."""
 import pytest
 
+from scot import bm25 as bm25_module
 from scot.bm25 import tokenize, BM25Index, reciprocal_rank_fusion
 
 
@@ -79,6 +80,48 @@ class TestBM25Index:
         assert bm25.doc_freqs["world"] == 2
         assert bm25.doc_freqs["python"] == 2
     
+    def test_index_builds_postings(self):
+        bm25 = BM25Index()
+        bm25.index(["hello world hello", "hello python"])
+        doc_ids, tfs = bm25.postings["hello"]
+        assert doc_ids.tolist() == [0, 1]
+        assert tfs.tolist() == [2, 1]
+        assert bm25.doc_lens.tolist() == [3, 2]
+    
+    def test_parallel_tokenize_matches_serial(self, monkeypatch):
+        docs = [f"doc{i} shared camelCase{i % 7}" for i in range(40)]
+        serial = BM25Index()
+        serial.index(docs)
+        
+        monkeypatch.setattr(bm25_module, "PARALLEL_TOKENIZE_MIN_DOCS", 0)
+        monkeypatch.setattr(bm25_module.os, "cpu_count", lambda: 2)
+        parallel = BM25Index()
+        parallel.index(docs)
+        
+        assert parallel.doc_freqs == serial.doc_freqs
+        assert parallel.doc_lens.tolist() == serial.doc_lens.tolist()
+        assert parallel.search("shared camel", top_k=5) == serial.search("shared camel", top_k=5)
+    
+    def test_repeated_query_uses_cache(self):
+        bm25 = BM25Index()
+        bm25.index(["hello world", "hello python"])
+        first = bm25.search("hello", top_k=2)
+        assert "hello" in bm25._query_cache
+        assert bm25.search("hello", top_k=2) == first
+    
+    def test_reindex_clears_query_cache(self):
+        bm25 = BM25Index()
+        bm25.index(["hello world", "other"])
+        bm25.search("hello", top_k=1)
+        bm25.index(["other", "hello world"])
+        assert bm25.search("hello", top_k=1)[0][0] == 1
+    
+    def test_fieldnorms_quantize_long_docs(self):
+        bm25 = BM25Index()
+        bm25.index(["word " * 5, "word " * 100])
+        # Short lengths are exact, long ones round down to a 4-bit mantissa
+        assert bm25_module._FIELDNORM_TABLE[bm25.norm_ids].tolist() == [5, 96]
+    
     def test_search_exact_match(self):
         bm25 = BM25Index()
         bm25.index([
@@ -110,6 +153,14 @@ class TestBM25Index:
         # All scores should be 0
         assert all(score == 0 for _, score in results)
     
+    def test_search_pads_with_unmatched_docs(self):
+        bm25 = BM25Index()
+        bm25.index(["foo bar", "hello world", "baz qux", "hello there"])
+        results = bm25.search("hello", top_k=4)
+        assert [idx for idx, _ in results[:2]] == [1, 3]
+        # Unmatched docs follow in index order with zero score
+        assert results[2:] == [(0, 0.0), (2, 0.0)]
+    
     def test_search_code_like(self):
         bm25 = BM25Index()
         bm25.index([
@@ -119,6 +170,50 @@ class TestBM25Index:
         ])
         results = bm25.search("calculate sum", top_k=3)
         assert results[0][0] == 0  # First doc matches best
+    
+    def test_numba_matches_numpy(self, monkeypatch):
+        pytest.importorskip("numba")
+        bm25 = BM25Index()
+        bm25.index([
+            "def calculate_sum(a, b): return a + b",
+            "def calculate_product(a, b): return a * b",
+            "sum of sum of sums",
+        ])
+        jit_results = bm25.search("calculate sum", top_k=3)
+        monkeypatch.setattr("scot.bm25.score_block", None)
+        numpy_results = bm25.search("calculate sum", top_k=3)
+        assert [idx for idx, _ in jit_results] == [idx for idx, _ in numpy_results]
+        for (_, a), (_, b) in zip(jit_results, numpy_results):
+            assert a == pytest.approx(b, rel=1e-5)
+
+
+class TestPersistence:
+    """Tests for saving and memory-mapped loading of the index."""
+    
+    def test_save_load_roundtrip(self, temp_dir):
+        docs = ["python programming language", "java programming", "python snake"]
+        bm25 = BM25Index()
+        bm25.index(docs)
+        bm25.save(temp_dir / "bm25")
+        
+        loaded = BM25Index.load(temp_dir / "bm25")
+        assert loaded.num_docs == 3
+        assert loaded.doc_freqs == bm25.doc_freqs
+        assert loaded.search("python programming", top_k=3) == bm25.search("python programming", top_k=3)
+    
+    def test_load_empty_index(self, temp_dir):
+        bm25 = BM25Index()
+        bm25.index([])
+        bm25.save(temp_dir / "bm25")
+        assert BM25Index.load(temp_dir / "bm25").search("anything") == []
+    
+    def test_load_rejects_truncated_postings(self, temp_dir):
+        bm25 = BM25Index()
+        bm25.index(["hello world", "hello there"])
+        bm25.save(temp_dir / "bm25")
+        (temp_dir / "bm25" / "postings.bin").write_bytes(b"\0" * 4)
+        with pytest.raises(ValueError):
+            BM25Index.load(temp_dir / "bm25")
 
 
 class TestReciprocalRankFusion:
@@ -157,6 +252,14 @@ class TestReciprocalRankFusion:
         fused = reciprocal_rank_fusion(rankings)
         assert fused == []
     
+    def test_top_k_matches_full_ranking(self):
+        rankings = [
+            [(0, 0.9), (1, 0.8), (2, 0.7), (3, 0.6)],
+            [(3, 0.9), (1, 0.8), (0, 0.7)],
+        ]
+        full = reciprocal_rank_fusion(rankings)
+        assert reciprocal_rank_fusion(rankings, top_k=2) == full[:2]
+    
     def test_disjoint_rankings(self):
         rankings = [
             [(0, 0.9), (1, 0.8)],
@@ -2,6 +2,7 @@
 import pytest
 from pathlib import Path
 
+from scot import chunker
 from scot.chunker import Chunk, chunk_file, chunk_python, chunk_markdown, chunk_lines
 
 
@@ -75,6 +76,27 @@ def baz():
         for name in func_names:
             assert any(f"def {name}" in c.text for c in chunks)
     
+    def test_nested_function_not_separate_chunk(self):
+        code = '''def outer():
+    def inner():
+        return 1
+    return inner()
+'''
+        chunks = chunk_python(code)
+        assert len(chunks) == 1
+        assert "def inner" in chunks[0].text
+    
+    def test_chunk_conditional_definitions(self):
+        code = '''try:
+    from fast import speedup
+except ImportError:
+    def speedup(x):
+        return x
+'''
+        chunks = chunk_python(code)
+        assert len(chunks) == 1
+        assert chunks[0].text.lstrip().startswith("def speedup")
+    
     def test_chunk_syntax_error_fallback(self):
         # Invalid Python should fall back to line-based
         code = '''def broken(
@@ -188,4 +210,21 @@ class TestChunkFile:
     def test_html_file(self):
         content = "<html><body>Hello</body></html>"
         chunks = chunk_file(Path("test.html"), content)
-        assert len(chunks) >= 1
\ No newline at end of file
+        assert len(chunks) >= 1
+    
+    def test_caches_by_content(self, monkeypatch):
+        calls = []
+        original = chunker.chunk_python
+        monkeypatch.setattr(chunker, "chunk_python", lambda c: calls.append(c) or original(c))
+        code = "def cached_twice(): pass"
+        first = chunk_file(Path("a.py"), code)
+        second = chunk_file(Path("b.py"), code)
+        assert first == second
+        assert len(calls) == 1
+    
+    def test_cache_keyed_by_file_type(self):
+        content = "class Cached:\n    def method(self):\n        pass\n"
+        py_chunks = chunk_file(Path("cached.py"), content)
+        txt_chunks = chunk_file(Path("cached.txt"), content)
+        assert len(py_chunks) == 2
+        assert len(txt_chunks) == 1
@@ -0,0 +1,56 @@
+"""Tests for the daemon client."""
+import socket
+import threading
+
+from scot.client import Client
+from scot.daemon import Daemon
+from scot.protocol import Request
+
+
+def _serve(server: socket.socket, daemon: Daemon, connections: int):
+    """Accept and serve a number of connections with the daemon's handler."""
+    for _ in range(connections):
+        conn, _ = server.accept()
+        daemon._handle_connection(conn)
+
+
+class TestClient:
+    """Tests for the persistent Client connection."""
+    
+    def test_multiple_requests_one_connection(self, temp_dir):
+        path = temp_dir / "test.sock"
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(path))
+        server.listen(1)
+        daemon = Daemon()
+        daemon.running = True
+        thread = threading.Thread(target=_serve, args=(server, daemon, 1))
+        thread.start()
+        
+        with server, Client(path) as client:
+            assert client.send(Request(action="ping")).success
+            response = client.send(Request(action="bogus"))
+            assert not response.success
+            assert "Unknown action" in response.error
+            assert client.send(Request(action="ping")).success
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+    
+    def test_reconnects_after_idle_close(self, temp_dir, monkeypatch):
+        monkeypatch.setattr("scot.daemon.CONNECTION_IDLE_TIMEOUT", 0.05)
+        path = temp_dir / "test.sock"
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(path))
+        server.listen(1)
+        daemon = Daemon()
+        daemon.running = True
+        thread = threading.Thread(target=_serve, args=(server, daemon, 2))
+        thread.start()
+        
+        with server, Client(path) as client:
+            assert client.send(Request(action="ping")).success
+            # Blocks until the daemon drops the idle connection
+            assert client.sock.recv(1, socket.MSG_PEEK) == b""
+            assert client.send(Request(action="ping")).success
+        thread.join(timeout=5)
+        assert not thread.is_alive()
@@ -1,7 +1,11 @@
 """Tests for communication protocol."""
+import socket
+import threading
+
 import pytest
 
-from scot.protocol import Request, Response
+from scot import protocol
+from scot.protocol import Request, Response, send_message, recv_message
 
 
 class TestRequest:
@@ -104,4 +108,55 @@ class TestResponse:
         assert resp2.success == resp.success
         assert resp2.error == resp.error
         assert resp2.results == resp.results
-        assert resp2.stats == resp.stats
\ No newline at end of file
+        assert resp2.stats == resp.stats
+
+
+class TestBinaryEncoding:
+    """Tests for the bytes encoding used on the wire."""
+    
+    def test_request_roundtrip(self):
+        req = Request(action="search", query="test", top_k=5, mode="bm25")
+        assert Request.from_bytes(req.to_bytes()) == req
+    
+    def test_response_roundtrip(self):
+        resp = Response(success=True, results=[{"score": 0.5, "f": "a.py"}])
+        resp2 = Response.from_bytes(resp.to_bytes())
+        assert resp2.results == resp.results
+        assert resp2.stats == {}
+    
+    def test_accepts_json_payload(self):
+        req = Request(action="ping")
+        assert Request.from_bytes(req.to_json().encode("utf-8")) == req
+    
+    def test_json_fallback_without_msgpack(self, monkeypatch):
+        monkeypatch.setattr(protocol, "msgpack", None)
+        resp = Response(success=True, stats={"n": 1})
+        data = resp.to_bytes()
+        assert data.startswith(b"{")
+        assert Response.from_bytes(data).stats == {"n": 1}
+
+
+class TestFraming:
+    """Tests for length-prefixed message framing."""
+    
+    def test_roundtrip(self):
+        a, b = socket.socketpair()
+        with a, b:
+            send_message(a, Request(action="ping").to_bytes())
+            assert Request.from_bytes(recv_message(b)).action == "ping"
+    
+    def test_large_message(self):
+        a, b = socket.socketpair()
+        payload = ("x" * 300_000 + "ü").encode("utf-8")
+        with a, b:
+            sender = threading.Thread(target=send_message, args=(a, payload))
+            sender.start()
+            assert recv_message(b) == payload
+            sender.join()
+    
+    def test_connection_closed(self):
+        a, b = socket.socketpair()
+        a.sendall(b"0000")
+        a.close()
+        with b, pytest.raises(ConnectionError):
+            recv_message(b)
@@ -1,7 +1,9 @@
 """Tests for search functionality."""
 import pytest
 
-from scot.search import SearchResult, add_context_lines
+from scot import search as search_module
+from scot.bm25 import BM25Index
+from scot.search import SearchResult, add_context_lines, load_persisted_bm25, persist_bm25
 
 
 class TestSearchResult:
@@ -91,4 +93,28 @@ class TestAddContextLines:
         
         # Should return original result if file not found
         new_result = add_context_lines(result, git_repo, context_lines=3)
-        assert new_result == result
\ No newline at end of file
+        assert new_result == result
+
+class TestPersistedBM25:
+    """Tests for the on-disk BM25 index cache."""
+    
+    def test_roundtrip_with_matching_chunks(self, temp_dir, monkeypatch):
+        monkeypatch.setattr(search_module, "BM25_DIR", temp_dir / "bm25")
+        bm25 = BM25Index()
+        bm25.index(["alpha beta", "beta gamma"])
+        persist_bm25(temp_dir, bm25, (1, 2))
+        
+        loaded = load_persisted_bm25(temp_dir, (1, 2))
+        assert loaded is not None
+        assert loaded.search("beta", top_k=2) == bm25.search("beta", top_k=2)
+    
+    def test_stale_chunks_not_loaded(self, temp_dir, monkeypatch):
+        monkeypatch.setattr(search_module, "BM25_DIR", temp_dir / "bm25")
+        bm25 = BM25Index()
+        bm25.index(["alpha beta", "beta gamma"])
+        persist_bm25(temp_dir, bm25, (1, 2))
+        assert load_persisted_bm25(temp_dir, (1, 3)) is None
+    
+    def test_missing_index(self, temp_dir, monkeypatch):
+        monkeypatch.setattr(search_module, "BM25_DIR", temp_dir / "bm25")
+        assert load_persisted_bm25(temp_dir, (1,)) is None